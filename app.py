@@ -1,11 +1,16 @@
 import streamlit as st
-import requests
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
 import time
 import os
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 import re
+import html
+import hashlib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
 
 st.set_page_config(
     page_title="Free RAG News Summarizer",
@@ -27,32 +32,101 @@ def get_api_keys():
 NEWSAPI_KEY, HUGGINGFACE_TOKEN = get_api_keys()
 
 
+@st.cache_resource
+def get_client():
+    """Shared HTTP/2 client so NewsAPI, RSS and HuggingFace calls reuse
+    keep-alive connections across reruns instead of a new TLS handshake"""
+    return httpx.Client(
+        http2=True,
+        timeout=30,
+        follow_redirects=True,
+        limits=httpx.Limits(max_keepalive_connections=8)
+    )
+
+
+RSS_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Attempts made while the HuggingFace model is cold-starting, and the
+# total seconds the summary spinner may wait across all of them
+SUMMARY_RETRIES = 4
+SUMMARY_DEADLINE = 40
+
+# Precompiled patterns for stripping HTML out of RSS descriptions
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+
+# Sentence boundaries: whitespace after terminal punctuation, or a newline
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+|\n+')
+
+# Precompiled word pattern used to tokenize articles and queries
+_WORD_RE = re.compile(r'[^\W_]+')
+
+# Stateless, so one instance serves both articles and queries
+VECTORIZER = HashingVectorizer(
+    n_features=2**18,
+    alternate_sign=False,
+    binary=True,
+    norm=None,
+    dtype=np.float32,
+    strip_accents='unicode',
+    tokenizer=_WORD_RE.findall,
+    token_pattern=None
+)
+
 
+def build_article_matrix(texts):
+    """Vectorize article texts into a sparse word-presence matrix"""
+    # CSC so the columns of a query's terms can be sliced out cheaply
+    return VECTORIZER.transform(texts).tocsc()
 
-def calculate_similarity(query, text):
-    """Calculate simple keyword-based similarity"""
-    query_words = set(re.findall(r'\w+', query.lower()))
-    text_words = set(re.findall(r'\w+', text.lower()))
 
-    if not query_words or not text_words:
-        return 0.0
+def dedupe_articles(articles):
+    """Drop syndicated copies that share the same normalized title"""
+    seen = set()
+    unique = []
+    for article in articles:
+        title = article.get('title') or ''
 
-    intersection = query_words.intersection(text_words)
-    return len(intersection) / len(query_words)
+        # Google News appends " - <Publisher>"; drop it so copies of the
+        # same story from different outlets share a key
+        if (article.get('source') or {}).get('name') == 'Google News':
+            title = title.rsplit(' - ', 1)[0]
+
+        title = _WS_RE.sub(' ', title.lower()).strip()
+        key = hashlib.blake2b(title.encode(), digest_size=8).digest()
+        if key not in seen:
+            seen.add(key)
+            unique.append(article)
+    return unique
+
+
+def calculate_similarity(query, article_matrix):
+    """Share of the query's words found in each article"""
+    query_vector = VECTORIZER.transform([query])
+    if not query_vector.nnz:
+        return np.zeros(article_matrix.shape[0], dtype=np.float32)
+
+    # Only the query's own words contribute, so sum just those columns
+    matches = article_matrix[:, query_vector.indices] @ query_vector.data
+    return matches / query_vector.nnz
 
 
 def simple_summarize(text, max_sentences=3):
     """Simple extractive summarization"""
-    sentences = text.split('.')
-    sentences = [s.strip() for s in sentences if len(s.strip()) > 20][:max_sentences]
-    return '. '.join(sentences) + '.'
+    sentences = (s.strip() for s in _SENTENCE_RE.split(text))
+    sentences = islice((s for s in sentences if len(s) > 20), max_sentences)
+    summary = ' '.join(s if s.endswith(('.', '!', '?')) else s + '.' for s in sentences)
+    # Nothing long enough to keep: show the whole (whitespace-collapsed) text
+    return summary or _WS_RE.sub(' ', text).strip() or '.'
 
 
  
 # FETCH NEWS
  
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=3600, max_entries=256)
 def fetch_news_newsapi(topic, days=7):
     if not NEWSAPI_KEY:
         return None, "Please add NEWSAPI_KEY to Streamlit Secrets"
@@ -72,7 +146,7 @@ def fetch_news_newsapi(topic, days=7):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = get_client().get(url, params=params, timeout=10)
         data = response.json()
 
         if data.get('status') == 'ok':
@@ -83,80 +157,127 @@ def fetch_news_newsapi(topic, days=7):
         return None, str(e)
 
 
-@st.cache_data(ttl=3600)
-def fetch_news_rss(topic):
-    """Fetch from RSS feeds - Python 3.13 compatible"""
-    feeds = [
-        f"https://news.google.com/rss/search?q={topic}&hl=en-US&gl=US&ceid=US:en",
-    ]
+def parse_rss_item(item):
+    """Convert an RSS <item> element into an article dict"""
+    title_elem = item.find('title')
+    link_elem = item.find('link')
+    desc_elem = item.find('description')
+
+    title = title_elem.text if title_elem is not None else ''
+    link_text = link_elem.text if link_elem is not None else ''
+    description = desc_elem.text if desc_elem is not None else ''
 
+    if description:
+        description = html.unescape(_WS_RE.sub(' ', _TAG_RE.sub('', description))).strip()
+
+    return {
+        'title': title,
+        'description': description,
+        'url': link_text,
+        'publishedAt': '',
+        'source': {'name': 'Google News'}
+    }
+
+
+def fetch_feed(client, feed_url, max_items=30):
+    """Stream and incrementally parse a single RSS feed"""
     articles = []
-    for feed_url in feeds:
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(feed_url, headers=headers, timeout=10)
+    try:
+        with client.stream('GET', feed_url, headers=RSS_HEADERS, timeout=10) as response:
             response.raise_for_status()
 
-            root = ET.fromstring(response.content)
+            # libxml2 pull parser that tolerates slightly malformed feeds
+            parser = ET.XMLPullParser(events=('end',), tag='item', huge_tree=False, recover=True)
 
-            items = root.findall('.//item')
+            item_count = 0
+            for chunk in response.iter_bytes():
+                parser.feed(chunk)
 
-            for item in items[:30]:
-                title_elem = item.find('title')
-                link_elem = item.find('link')
-                desc_elem = item.find('description')
+                for _, item in parser.read_events():
+                    article = parse_rss_item(item)
+                    if article['title']:
+                        articles.append(article)
 
-                title = title_elem.text if title_elem is not None else ''
-                link_text = link_elem.text if link_elem is not None else ''
-                description = desc_elem.text if desc_elem is not None else ''
+                    # Drop parsed items so the tree stays one item deep
+                    item.clear()
+                    while item.getprevious() is not None:
+                        del item.getparent()[0]
 
-                if description:
-                    try:
-                        soup = BeautifulSoup(description, 'html.parser')
-                        description = soup.get_text()
-                    except:
-                        pass
+                    item_count += 1
+                    if item_count >= max_items:
+                        return articles
+    except Exception:
+        pass
 
-                article = {
-                    'title': title,
-                    'description': description,
-                    'url': link_text,
-                    'publishedAt': '',
-                    'source': {'name': 'Google News'}
-                }
+    return articles
+
+
+@st.cache_data(ttl=3600, max_entries=256)
+def fetch_news_rss(topic):
+    """Fetch from RSS feeds - Python 3.13 compatible"""
+    feeds = [
+        f"https://news.google.com/rss/search?q={topic}&hl=en-US&gl=US&ceid=US:en",
+    ]
 
-                if article['title']:
-                    articles.append(article)
+    # Stream and parse all feeds concurrently
+    # Resolve the cached client here; worker threads have no script context
+    client = get_client()
+    with ThreadPoolExecutor(max_workers=min(8, len(feeds))) as executor:
+        feed_articles = list(executor.map(lambda url: fetch_feed(client, url), feeds))
 
-        except Exception as e:
-            continue
+    articles = [article for feed in feed_articles for article in feed]
 
     return articles, None
 
 
-def summarize_with_api(text):
+def summarize_with_api(text, max_length=130):
     """Try HuggingFace API, fallback to simple summary"""
     if not HUGGINGFACE_TOKEN:
         return simple_summarize(text)
 
+    # Already about summary length (~4 chars per token), BART would echo it
+    if len(text) < max_length * 4:
+        return simple_summarize(text)
+
     API_URL = "https://api-inference.huggingface.co/models/facebook/bart-large-cnn"
     headers = {"Authorization": f"Bearer {HUGGINGFACE_TOKEN}"}
 
+    deadline = time.monotonic() + SUMMARY_DEADLINE
+
     try:
-        response = requests.post(
-            API_URL,
-            headers=headers,
-            json={"inputs": text[:1024]},
-            timeout=30
-        )
-        result = response.json()
+        for attempt in range(SUMMARY_RETRIES):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            response = get_client().post(
+                API_URL,
+                headers=headers,
+                json={"inputs": text[:1024], "parameters": {"max_length": max_length}},
+                timeout=min(30, remaining)
+            )
+            result = response.json()
+
+            if isinstance(result, list) and len(result) > 0:
+                return result[0].get('summary_text', simple_summarize(text))
+
+            # Only loading / rate-limit errors clear up; anything else won't
+            retryable = response.status_code in (429, 503) or (
+                isinstance(result, dict) and 'estimated_time' in result
+            )
+            if not retryable or attempt == SUMMARY_RETRIES - 1:
+                break
+
+            # Back off exponentially, or as long as the API suggests while
+            # the model loads, capped per attempt and by the overall deadline
+            estimated = result.get('estimated_time') if isinstance(result, dict) else None
+            delay = min(estimated or 2 ** attempt, 8)
+            remaining = deadline - time.monotonic()
+            if delay >= remaining:
+                break
+            time.sleep(delay)
 
-        if isinstance(result, list) and len(result) > 0:
-            return result[0].get('summary_text', simple_summarize(text))
-        else:
-            return simple_summarize(text)
+        return simple_summarize(text)
     except:
         return simple_summarize(text)
 
@@ -221,7 +342,12 @@ def main():
                 st.warning("No articles found. Try a different topic.")
                 return
 
+            articles = dedupe_articles(articles)
             st.session_state.articles = articles
+            st.session_state.article_matrix = build_article_matrix([
+                f"{a['title']}. {a.get('description', '')}"
+                for a in articles
+            ])
             st.success(f"✅ Found {len(articles)} articles")
 
     if st.session_state.get('articles'):
@@ -236,16 +362,12 @@ def main():
         if st.button("🔎 Get Answer") and query:
             articles = st.session_state.articles
 
-            # Calculate similarity for each article
-            scored_articles = []
-            for article in articles:
-                text = f"{article['title']}. {article.get('description', '')}"
-                score = calculate_similarity(query, text)
-                scored_articles.append((score, article))
+            # Calculate similarity for all articles at once
+            scores = calculate_similarity(query, st.session_state.article_matrix)
 
-            # Sort by score and get top results
-            scored_articles.sort(reverse=True, key=lambda x: x[0])
-            relevant_articles = [art for score, art in scored_articles[:top_k] if score > 0]
+            # Stable sort so ties keep their feed order
+            top_indices = np.argsort(-scores, kind='stable')[:top_k]
+            relevant_articles = [articles[i] for i in top_indices if scores[i] > 0]
 
             if not relevant_articles:
                 st.warning("No relevant articles found for your question.")